@@ -0,0 +1,108 @@
+"""
+Throughput of size-targeted batch compression against fixed quality.
+
+Compresses the same images with a fixed quality and then with a max_size
+target (cold, then again once the predictor has been fitted from the
+history the first targeted pass recorded), and reports wall time, encodes
+per image and the share of images needing a single encode for each pass.
+Encodes count full-size saves only; the probe encodes image_features makes
+of a small mosaic of each image (PROBE_QUALITIES at TILES x TILE_SIZE pixels
+square) are reported separately as probes per image.
+
+The fitted pass re-encodes the images the predictor was fitted on, so it
+is an optimistic estimate; point it at a separate set to measure unseen
+images.
+
+Usage:
+    python benchmarks/quality.py IMAGE_DIR [--quality Q] [--max-size BYTES] [--workers N]
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import compressor.processor  # noqa: E402
+from compressor import ImageProcessor  # noqa: E402
+from compressor.processor import SIZE_TOLERANCE  # noqa: E402
+from compressor.predict import PROBE_QUALITIES  # noqa: E402
+
+
+def count_encodes(processor: ImageProcessor) -> tuple[list[int], list[int]]:
+    """Wrap processor so each image appends its number of full-size encodes
+    and of probe encodes to the two returned lists"""
+    counts, probes = [], []
+    current = threading.local()
+    encode_image, save_image = processor.encode_image, processor.save_image
+    image_features = compressor.processor.image_features
+
+    def counting_encode_image(*args, **kwargs):
+        current.count = current.probes = 0
+        try:
+            return encode_image(*args, **kwargs)
+        finally:
+            counts.append(current.count)
+            probes.append(current.probes)
+            del current.probes
+
+    def counting_save_image(*args, **kwargs):
+        current.count += 1
+        return save_image(*args, **kwargs)
+
+    def counting_image_features(*args, **kwargs):
+        # Module-level, so only count calls made inside this processor's encodes
+        if hasattr(current, 'probes'):
+            current.probes += len(PROBE_QUALITIES)
+        return image_features(*args, **kwargs)
+
+    processor.encode_image = counting_encode_image
+    processor.save_image = counting_save_image
+    compressor.processor.image_features = counting_image_features
+    return counts, probes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('image_dir')
+    parser.add_argument('--quality', type=int, default=85)
+    parser.add_argument('--max-size', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--size-tolerance', type=float, default=SIZE_TOLERANCE)
+    args = parser.parse_args()
+
+    inputs = sorted(glob.glob(os.path.join(args.image_dir, '*.jp*g')))
+    if not inputs:
+        print(f"No JPEG images found in {args.image_dir}")
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history_path = os.path.join(tmp, 'history.jsonl')
+        # The fixed pass runs without history, as fixed-quality mode would
+        fixed = ImageProcessor()
+        targeted = ImageProcessor(history_path=history_path, size_tolerance=args.size_tolerance)
+
+        passes = [('fixed', fixed, None),
+                  ('target cold', targeted, args.max_size),
+                  ('target fitted', targeted, args.max_size)]
+        for label, processor, max_size in passes:
+            counts, probes = count_encodes(processor)
+            start = time.perf_counter()
+            results = processor.batch_compress(inputs, tmp, args.quality,
+                                               workers=args.workers, max_size=max_size)
+            elapsed = time.perf_counter() - start
+            encodes = sum(counts) / max(1, len(counts))
+            probed = sum(probes) / max(1, len(probes))
+            single = counts.count(1) / max(1, len(counts))
+            over = sum(1 for _, _, size in results if max_size and size > max_size)
+            print(f"{label:14} {elapsed:7.2f} s  {len(results) / elapsed:7.1f} img/s  "
+                  f"{encodes:4.2f} encodes/img  {probed:4.2f} probes/img  "
+                  f"{single:4.0%} single-encode  {over} over target")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Cold-start benchmark for the core compressor package.
+
+Every sample runs in a fresh interpreter, the way per-file subprocess and
+serverless workers do, and reports the median wall time of:
+
+  import    - `import compressor`
+  compress  - import plus compressing a single small JPEG to JPEG and to
+              WebP, failing if more Pillow plugins than the input and
+              output format's are loaded
+
+Usage:
+    python benchmarks/startup.py [--runs N] [--max-import-ms MS] [--max-compress-ms MS]
+
+Exits non-zero when a threshold is exceeded or when importing the core
+package pulls in PyQt6 or Pillow, so it can be used as a regression check.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+IMPORT_SNIPPET = """
+import sys
+import compressor
+heavy = sorted(m for m in ('PyQt6', 'PIL') if m in sys.modules)
+if heavy:
+    sys.exit('core import pulled in: ' + ', '.join(heavy))
+"""
+
+COMPRESS_SNIPPET = """
+import sys
+from compressor import ImageProcessor
+ImageProcessor().compress_image(sys.argv[1], sys.argv[2], 85)
+plugins = sorted(m for m in sys.modules if m.startswith('PIL.') and m.endswith('ImagePlugin'))
+if len(plugins) > 2:
+    sys.exit(f'loaded {len(plugins)} Pillow plugins, expected at most 2 (input and output)')
+"""
+
+
+def time_subprocess(code: str, args: list[str], runs: int) -> float:
+    """Run code in a fresh interpreter `runs` times and return the median ms"""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR, PYTHONDONTWRITEBYTECODE='')
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-c', code, *args],
+                              env=env, capture_output=True, text=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip() or f"exit code {proc.returncode}")
+        samples.append(elapsed)
+    return statistics.median(samples)
+
+
+def make_sample_image(path: str):
+    from PIL import Image
+
+    Image.new('RGB', (256, 256), (139, 92, 246)).save(path, quality=95)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max-import-ms', type=float)
+    parser.add_argument('--max-compress-ms', type=float)
+    args = parser.parse_args()
+
+    baseline = time_subprocess('pass', [], args.runs)
+    try:
+        import_ms = time_subprocess(IMPORT_SNIPPET, [], args.runs)
+    except RuntimeError as e:
+        print(f"FAIL import: {e}")
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, 'input.jpg')
+        make_sample_image(input_path)
+        compress_ms = {}
+        for ext in ('.jpg', '.webp'):
+            output_path = os.path.join(tmp, f'output{ext}')
+            try:
+                compress_ms[ext] = time_subprocess(COMPRESS_SNIPPET, [input_path, output_path], args.runs)
+            except RuntimeError as e:
+                print(f"FAIL compress jpg->{ext[1:]}: {e}")
+                return 1
+
+    print(f"interpreter  {baseline:8.1f} ms")
+    print(f"import       {import_ms:8.1f} ms  (+{import_ms - baseline:.1f})")
+    for ext, ms in compress_ms.items():
+        label = f"jpg->{ext[1:]}"
+        print(f"{label:12} {ms:8.1f} ms  (+{ms - baseline:.1f})")
+
+    failed = False
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"FAIL import took {import_ms:.1f} ms > {args.max_import_ms} ms")
+        failed = True
+    for ext, ms in compress_ms.items():
+        if args.max_compress_ms is not None and ms > args.max_compress_ms:
+            print(f"FAIL compress jpg->{ext[1:]} took {ms:.1f} ms > {args.max_compress_ms} ms")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
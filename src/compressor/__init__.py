@@ -0,0 +1,12 @@
+"""
+Core image compression package.
+
+Nothing in this package imports the GUI toolkit, and Pillow is only imported
+(together with the plugins for the formats in use) when an image is opened,
+so library users and short-lived worker processes start quickly.
+"""
+
+from compressor.output import OutputPolicy
+from compressor.processor import ImageProcessor
+
+__all__ = ['ImageProcessor', 'OutputPolicy']
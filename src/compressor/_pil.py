@@ -0,0 +1,97 @@
+import importlib
+import os
+
+# Pillow plugin module for each supported file extension
+PLUGINS = {
+    '.jpg': 'JpegImagePlugin',
+    '.jpeg': 'JpegImagePlugin',
+    '.png': 'PngImagePlugin',
+    '.bmp': 'BmpImagePlugin',
+    '.webp': 'WebPImagePlugin',
+}
+
+# Pillow plugin module for each supported save format
+FORMAT_PLUGINS = {
+    'JPEG': 'JpegImagePlugin',
+    'PNG': 'PngImagePlugin',
+    'BMP': 'BmpImagePlugin',
+    'WEBP': 'WebPImagePlugin',
+}
+
+# Pillow save format for each supported file extension
+FORMATS = {
+    '.jpg': 'JPEG',
+    '.jpeg': 'JPEG',
+    '.png': 'PNG',
+    '.bmp': 'BMP',
+    '.webp': 'WEBP',
+}
+
+# Image modes each format can store; anything else is converted first
+SAVE_MODES = {
+    'JPEG': ('1', 'L', 'RGB', 'CMYK'),
+    'BMP': ('1', 'L', 'P', 'RGB', 'RGBA'),
+}
+
+
+def convert_for(img, format: str):
+    """Return img in a mode the given save format can store"""
+    modes = SAVE_MODES.get(format)
+    if modes is None or img.mode in modes:
+        return img
+    if img.mode.startswith('I;16'):
+        # Scale 16-bit greyscale down rather than clipping it at 255
+        return img.convert('I').point(lambda v: v / 256).convert('L')
+    return img.convert('L' if img.mode in ('I', 'F') else 'RGB')
+
+
+def format_for(path: str) -> str:
+    """
+    Return the Pillow save format implied by the extension of path
+
+    Extensions outside FORMATS fall back to Pillow's own lookup, which loads
+    every plugin, so any output format Pillow can write still works.
+    """
+    ext = os.path.splitext(path.lower())[1]
+    if ext in FORMATS:
+        return FORMATS[ext]
+    from PIL import Image
+
+    format = Image.registered_extensions().get(ext)
+    if format is None or format not in Image.SAVE:
+        raise ValueError(f"unknown file extension: {ext}")
+    return format
+
+
+def load_image_module(*paths: str):
+    """
+    Import PIL.Image together with only the plugins needed for the given paths
+
+    Pillow normally imports a set of common plugins on the first open/save and
+    every plugin it ships when that is not enough. Registering just the
+    plugins for the extensions in use keeps cold start cheap; files whose
+    content does not match their extension still fall back to Pillow's full
+    plugin scan.
+    """
+    return _load(PLUGINS.get(os.path.splitext(path.lower())[1]) for path in paths)
+
+
+def load_format_module(*formats: str):
+    """Like load_image_module, but for Pillow format names such as 'WEBP'"""
+    return _load(FORMAT_PLUGINS.get(format.upper()) for format in formats)
+
+
+def _load(plugins):
+    from PIL import Image
+
+    for plugin in plugins:
+        if plugin:
+            importlib.import_module(f'PIL.{plugin}')
+
+    # Skip preinit(); Image.open/save still call init() on a miss. This relies
+    # on Pillow's private _initialized counter (checked up to Pillow 10.2), so
+    # it is left alone if a Pillow release drops or changes it
+    initialized = getattr(Image, '_initialized', None)
+    if isinstance(initialized, int) and initialized < 1:
+        Image._initialized = 1
+    return Image
@@ -0,0 +1,169 @@
+import atexit
+import json
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Records are buffered in memory and appended to the log in batches
+FLUSH_EVERY = 256
+# Once the log grows past this many bytes it is cut down to KEEP_RECORDS
+MAX_BYTES = 4 * 1024 * 1024
+KEEP_RECORDS = 10000
+# Block size used when reading the log backwards from its end
+READ_BLOCK = 64 * 1024
+
+# Histories with a file handle or records still to write, closed at exit
+_open_histories = weakref.WeakSet()
+
+
+@atexit.register
+def _close_all():
+    for history in list(_open_histories):
+        history.close()
+
+
+@contextmanager
+def _exclusive(path: str):
+    """Hold an exclusive lock on path against other processes and handles"""
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            yield
+            return
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class History:
+    """
+    Append-only log of encodes, one JSON object per line, used to fit the
+    quality predictor.
+
+    Each record holds the output format, the image features, the quality
+    used and the resulting bits per pixel. Records are buffered and written
+    through a file handle kept open between flushes, and the log is
+    compacted to its most recent records whenever it outgrows MAX_BYTES.
+    Appends and compaction hold a lock on a sidecar "<path>.lock" file so
+    several processes can share one log, and a handle left pointing at a
+    log another process has since compacted is reopened before writing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = []
+        self._file = None
+        _open_histories.add(self)
+
+    def __del__(self):
+        self.close()
+
+    def record(self, format: str, features: list[float], quality: int, bpp: float):
+        """Queue one encode for the log"""
+        line = json.dumps({'format': format, 'features': features,
+                           'quality': quality, 'bpp': bpp})
+        with self._lock:
+            self._pending.append(line)
+            if len(self._pending) >= FLUSH_EVERY:
+                self._flush()
+
+    def flush(self):
+        """Write queued records to the log"""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        """Flush queued records and release the file handle"""
+        with self._lock:
+            self._flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _flush(self):
+        if not self._pending:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _exclusive(self.path + '.lock'):
+            self._open()
+            self._file.write('\n'.join(self._pending) + '\n')
+            self._file.flush()
+            self._pending = []
+            if self._file.tell() > MAX_BYTES:
+                self._compact()
+
+    def _open(self):
+        """Open the log for appending, reopening it if it has been replaced"""
+        if self._file is not None:
+            opened = os.fstat(self._file.fileno())
+            try:
+                current = os.stat(self.path)
+            except FileNotFoundError:
+                current = None
+            if current is not None and (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino):
+                return
+            self._file.close()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _compact(self):
+        """Rewrite the log keeping only its most recent KEEP_RECORDS lines"""
+        self._file.close()
+        self._file = None
+        lines = self._tail_lines(KEEP_RECORDS)
+        temp_path = f"{self.path}.{os.getpid()}.compact"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.writelines(line + '\n' for line in lines)
+        try:
+            os.replace(temp_path, self.path)
+        except OSError:
+            # Windows refuses while another process has the log open;
+            # leave it to grow until a later flush can compact it
+            os.unlink(temp_path)
+
+    def _tail_lines(self, limit: int) -> list[str]:
+        """Return up to the last limit lines of the log without reading all of it"""
+        try:
+            with open(self.path, 'rb') as f:
+                end = f.seek(0, os.SEEK_END)
+                position, data = end, b''
+                while position > 0 and data.count(b'\n') <= limit:
+                    step = min(READ_BLOCK, position)
+                    position -= step
+                    f.seek(position)
+                    data = f.read(step) + data
+        except FileNotFoundError:
+            return []
+        lines = data.decode('utf-8', errors='replace').splitlines()
+        # The first line may be cut off unless the whole file was read
+        if position > 0:
+            lines = lines[1:]
+        return lines[-limit:]
+
+    def load(self, limit: int = KEEP_RECORDS) -> list[dict]:
+        """Return up to the last limit readable records, skipping malformed lines"""
+        self.flush()
+        records = []
+        for line in self._tail_lines(limit):
+            try:
+                record = json.loads(line)
+                records.append({'format': record['format'],
+                                'features': [float(x) for x in record['features']],
+                                'quality': int(record['quality']),
+                                'bpp': float(record['bpp'])})
+            except (ValueError, KeyError, TypeError):
+                continue
+        return records
@@ -0,0 +1,176 @@
+import os
+from typing import Optional, Tuple
+
+from compressor._pil import FORMATS
+
+FLAT = 'flat'
+MIRROR = 'mirror'
+IN_PLACE = 'in_place'
+
+
+class OutputPolicy:
+    """
+    Decides where each compressed image is written, and whether it is
+    written at all.
+
+    Modes:
+        flat: every output goes directly into the output directory
+        mirror: outputs keep their directory structure relative to source_root
+        in_place: outputs replace their inputs
+
+    Args:
+        mode: One of 'flat', 'mirror' or 'in_place'
+        template: Output file name; may use {name}, {stem} and {ext}
+            (ext includes the dot and reflects any extension rewrite) and
+            must not contain directories
+        extension: Re-encode into the format of this extension (e.g. '.webp')
+        source_root: Root of the input tree (required for mirror mode)
+        min_savings: Keep the original unless the result is smaller, and at
+            least this many percent smaller; checked before anything is
+            written. Defaults to 0 in place (only smaller results replace
+            originals) and to always writing otherwise
+    """
+
+    MODES = (FLAT, MIRROR, IN_PLACE)
+
+    def __init__(self,
+                 mode: str = FLAT,
+                 template: Optional[str] = None,
+                 extension: Optional[str] = None,
+                 source_root: Optional[str] = None,
+                 min_savings: Optional[float] = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown output mode: {mode}")
+        if mode == MIRROR and source_root is None:
+            raise ValueError("Mirror mode requires a source_root")
+        if extension is not None:
+            if not extension.startswith('.'):
+                extension = f".{extension}"
+            if extension.lower() not in FORMATS:
+                raise ValueError(f"Unsupported output extension: {extension}")
+
+        self.mode = mode
+        self.template = template or ('compressed_{name}' if mode == FLAT else '{name}')
+        # Format once with dummy values so bad templates fail here, not mid-batch
+        self._format_name('image', '.jpg')
+        self.extension = extension.lower() if extension else None
+        self.source_root = os.path.abspath(source_root) if source_root else None
+        if min_savings is None and mode == IN_PLACE:
+            min_savings = 0
+        self.min_savings = min_savings
+        self._created_dirs = set()
+
+    def output_name(self, input_path: str) -> str:
+        """Return the output file name (without directory) for an input"""
+        stem, ext = os.path.splitext(os.path.basename(input_path))
+        return self._format_name(stem, self.extension or ext)
+
+    def _format_name(self, stem: str, ext: str) -> str:
+        """Fill in the template, rejecting anything but a plain file name"""
+        try:
+            name = self.template.format(name=f"{stem}{ext}", stem=stem, ext=ext)
+        except KeyError as e:
+            raise ValueError(f"Unknown field {e} in output template {self.template!r}") from None
+        except (AttributeError, IndexError, ValueError) as e:
+            raise ValueError(f"Invalid output template {self.template!r}: {e}") from None
+        if os.path.basename(name) != name or name in ('', os.curdir, os.pardir):
+            raise ValueError(f"Output template {self.template!r} must produce a plain file name, got {name!r}")
+        return name
+
+    def output_path(self, input_path: str, output_dir: Optional[str] = None) -> str:
+        """Return the path the compressed version of input_path is written to"""
+        name = self.output_name(input_path)
+        if self.mode == IN_PLACE:
+            return os.path.join(os.path.dirname(input_path), name)
+        if output_dir is None:
+            raise ValueError(f"{self.mode} mode requires an output directory")
+        if self.mode == MIRROR:
+            relative = os.path.relpath(os.path.dirname(os.path.abspath(input_path)),
+                                       self.source_root)
+            if relative.startswith(os.pardir):
+                raise ValueError(f"{input_path} is outside {self.source_root}")
+            return os.path.normpath(os.path.join(output_dir, relative, name))
+        return os.path.join(output_dir, name)
+
+    def plan(self, input_paths: list[str], output_dir: Optional[str] = None) -> Tuple[dict, dict]:
+        """
+        Map every input to its output path, refusing inputs whose output
+        would overwrite another image
+
+        An input is refused when its output is claimed by another input too,
+        is another input, is the input itself outside in_place mode, or (in
+        place) already exists as some other file.
+        Output names are compared case-insensitively, which is conservative on
+        case-sensitive filesystems. Inputs listed more than once are planned
+        once, in the order they first appear.
+
+        Returns:
+            Tuple of (outputs, refused) dicts keyed by input path, holding the
+            output path and the reason for refusing respectively
+        """
+        unique = {}
+        for input_path in input_paths:
+            unique.setdefault(os.path.normcase(os.path.abspath(input_path)), input_path)
+        input_paths = list(unique.values())
+
+        outputs, refused = {}, {}
+        claims = {}
+        for input_path in input_paths:
+            try:
+                output_path = self.output_path(input_path, output_dir)
+            except ValueError as e:
+                refused[input_path] = str(e)
+                continue
+            outputs[input_path] = output_path
+            claims.setdefault(_path_key(output_path), []).append(input_path)
+        inputs = {}
+        for input_path in input_paths:
+            inputs.setdefault(_path_key(input_path), []).append(input_path)
+
+        for key, claimants in claims.items():
+            for input_path in claimants:
+                output_path = outputs[input_path]
+                if _same_file(output_path, input_path):
+                    # Only in-place mode replaces originals atomically and
+                    # only with smaller results
+                    if self.mode != IN_PLACE:
+                        refused[input_path] = (f"output {output_path} is the input itself; "
+                                               f"use in_place mode to replace originals")
+                    continue
+                if len(claimants) > 1:
+                    others = ', '.join(p for p in claimants if p != input_path)
+                    refused[input_path] = f"output {output_path} is also the output of {others}"
+                elif any(p != input_path for p in inputs.get(key, ())):
+                    refused[input_path] = f"output {output_path} would overwrite another input"
+                elif self.mode == IN_PLACE and os.path.exists(output_path):
+                    refused[input_path] = f"output {output_path} already exists"
+        for input_path in refused:
+            outputs.pop(input_path, None)
+        return outputs, refused
+
+    def should_write(self, original_size: int, compressed_size: int) -> bool:
+        """Return whether a result is small enough to replace the original"""
+        if self.min_savings is None:
+            return True
+        return (compressed_size < original_size
+                and compressed_size <= original_size * (1 - self.min_savings / 100))
+
+    def prepare(self, output_path: str):
+        """Create the output directory for output_path if needed"""
+        directory = os.path.dirname(output_path)
+        if directory and directory not in self._created_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._created_dirs.add(directory)
+
+
+def _path_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path)).casefold()
+
+
+def _same_file(a: str, b: str) -> bool:
+    if os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b)):
+        return True
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
@@ -0,0 +1,229 @@
+import io
+import math
+from typing import Optional
+
+from compressor._pil import load_format_module
+
+# Longest side of the downsampled image features are computed on
+FEATURE_SIZE = 128
+# Colour counts are capped here; anything above is treated as photographic
+MAX_COLORS = 4096
+# Full-resolution tiles (a TILES x TILES grid of TILE_SIZE squares) spread
+# over the image are pasted into a mosaic, used for fine detail that
+# downsampling averages away and for the probe encodes
+TILES = 4
+TILE_SIZE = 64
+# Qualities the mosaic is probe-encoded at in the target format
+PROBE_QUALITIES = (50, 90)
+# Length of the feature vector; history records of other lengths were
+# written by an older feature set and are ignored
+FEATURE_COUNT = 7
+# Records needed per format before a model is fitted
+MIN_SAMPLES = 24
+# Only the most recent records per format are fitted on
+MAX_SAMPLES = 5000
+# Ridge penalty keeping the fit stable with few or collinear samples
+RIDGE = 1e-3
+
+
+def _mosaic(img):
+    """Paste full-resolution tiles from across img into one small image"""
+    from PIL import Image
+
+    width, height = img.size
+    tile = min(TILE_SIZE, width, height)
+    mosaic = Image.new(img.mode, (tile * TILES, tile * TILES))
+    for i in range(TILES):
+        for j in range(TILES):
+            left = (width - tile) * i // max(1, TILES - 1)
+            top = (height - tile) * j // max(1, TILES - 1)
+            mosaic.paste(img.crop((left, top, left + tile, top + tile)), (i * tile, j * tile))
+    return mosaic
+
+
+def image_features(img, format: str) -> list[float]:
+    """
+    Compute cheap content features of img for encoding as format
+
+    Returns [entropy, edge density, fine detail, log2 colour count,
+    log megapixels, log bpp of the probe encodes...]. Entropy, edges and
+    colours come from a downsampled copy; fine detail and the probe encodes
+    from a mosaic of full-resolution tiles.
+    """
+    from PIL import ImageFilter, ImageStat
+
+    if img.mode not in ('L', 'RGB'):
+        img = img.convert('RGB')
+    width, height = img.size
+    factor = max(1, max(width, height) // FEATURE_SIZE)
+    small = img.reduce(factor) if factor > 1 else img
+    gray = small.convert('L')
+
+    entropy = gray.entropy()
+    edges = ImageStat.Stat(gray.filter(ImageFilter.FIND_EDGES)).mean[0] / 255
+    colors = small.getcolors(MAX_COLORS)
+    color_count = len(colors) if colors is not None else MAX_COLORS
+    megapixels = width * height / 1_000_000
+
+    # The probes may be the first encode into format, so register its plugin
+    load_format_module(format)
+    mosaic = _mosaic(img)
+    detail = ImageStat.Stat(mosaic.convert('L').filter(ImageFilter.FIND_EDGES)).mean[0] / 255
+    mosaic_pixels = mosaic.size[0] * mosaic.size[1]
+    probes = []
+    buffer = io.BytesIO()
+    for quality in PROBE_QUALITIES:
+        buffer.seek(0)
+        mosaic.save(buffer, format=format, quality=quality, optimize=True)
+        probes.append(math.log(max(1, buffer.tell()) * 8 / mosaic_pixels))
+
+    return [entropy, edges, detail, math.log2(color_count), math.log(megapixels), *probes]
+
+
+def _quantizer_scale(quality: int) -> float:
+    """
+    Log of the libjpeg quantization table scale for a quality setting
+
+    Encoded size is close to log-linear in this, which makes it a better
+    model term than quality itself (and a usable proxy for WebP too).
+    """
+    scale = 5000 / quality if quality < 50 else max(1, 200 - 2 * quality)
+    return math.log(scale / 100)
+
+
+def _highest_quality(fits, max_quality: int) -> int:
+    for quality in range(max_quality, 1, -1):
+        if fits(quality):
+            return quality
+    return 1
+
+
+def interpolate_quality(a: tuple[int, float], b: tuple[int, float], bpp: float,
+                        max_quality: int = 100) -> Optional[int]:
+    """
+    Predict the highest quality within bpp bits per pixel from two encodes
+    of the same image, given as (quality, bpp) pairs
+
+    Interpolates log bits per pixel linearly in the log quantizer scale.
+    Returns None if the two encodes do not define a usable slope.
+    """
+    (quality_a, bpp_a), (quality_b, bpp_b) = a, b
+    x_a, x_b = _quantizer_scale(quality_a), _quantizer_scale(quality_b)
+    if x_a == x_b or bpp_a <= 0 or bpp_b <= 0:
+        return None
+    slope = (math.log(bpp_b) - math.log(bpp_a)) / (x_b - x_a)
+    # Coarser quantization must give smaller output
+    if slope >= 0:
+        return None
+    x_target = x_a + (math.log(bpp) - math.log(bpp_a)) / slope
+    return _highest_quality(lambda q: _quantizer_scale(q) >= x_target, max_quality)
+
+
+def _design_row(features: list[float], quality: int) -> list[float]:
+    """Terms of the log bits-per-pixel model for one encode"""
+    entropy, edges, detail, log_colors, log_megapixels, probe_low, probe_high = features
+    x = _quantizer_scale(quality)
+    return [1.0, entropy, edges, detail, log_colors, log_megapixels, probe_low, probe_high,
+            x, x * x, x * entropy, x * edges, x * detail, x * log_colors,
+            x * probe_low, x * probe_high]
+
+
+def _solve(a: list[list[float]], b: list[float]) -> list[float]:
+    """Solve a x = b by Gaussian elimination with partial pivoting"""
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+        m[col], m[pivot] = m[pivot], m[col]
+        if abs(m[col][col]) < 1e-12:
+            raise ValueError("Singular system")
+        for r in range(col + 1, n):
+            scale = m[r][col] / m[col][col]
+            for c in range(col, n + 1):
+                m[r][c] -= scale * m[col][c]
+    x = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        x[r] = (m[r][n] - sum(m[r][c] * x[c] for c in range(r + 1, n))) / m[r][r]
+    return x
+
+
+class QualityPredictor:
+    """
+    Predicts the encoder quality needed to reach a target size from image
+    features.
+
+    A per-format least-squares model of log bits per pixel in terms of the
+    features and quality is fitted on recorded encodes, and inverted by
+    picking the highest quality whose predicted size fits the target.
+    """
+
+    def __init__(self):
+        self.coefficients: dict[str, list[float]] = {}
+
+    def fit(self, records: list[dict]):
+        """Fit one model per format from history records"""
+        by_format: dict[str, list[dict]] = {}
+        for record in records:
+            if record['bpp'] > 0 and len(record['features']) == FEATURE_COUNT:
+                by_format.setdefault(record['format'], []).append(record)
+
+        coefficients = {}
+        for format, samples in by_format.items():
+            samples = samples[-MAX_SAMPLES:]
+            # Samples at a single quality say nothing about how size scales
+            if len(samples) < MIN_SAMPLES or len({s['quality'] for s in samples}) < 3:
+                continue
+            rows = [_design_row(s['features'], s['quality']) for s in samples]
+            targets = [math.log(s['bpp']) for s in samples]
+            n = len(rows[0])
+            xtx = [[sum(row[i] * row[j] for row in rows) for j in range(n)] for i in range(n)]
+            for i in range(1, n):
+                xtx[i][i] += RIDGE * len(rows)
+            xty = [sum(row[i] * t for row, t in zip(rows, targets)) for i in range(n)]
+            try:
+                coefficients[format] = _solve(xtx, xty)
+            except ValueError:
+                continue
+        self.coefficients = coefficients
+
+    def predict_bpp(self, format: str, features: list[float], quality: int) -> Optional[float]:
+        """Predict bits per pixel of an encode, or None without a fitted model"""
+        weights = self.coefficients.get(format)
+        if weights is None:
+            return None
+        return math.exp(sum(w * x for w, x in zip(weights, _design_row(features, quality))))
+
+    def predict(self, format: str, features: list[float], bpp: float,
+                max_quality: int = 100, observed: Optional[tuple[int, float]] = None) -> Optional[int]:
+        """
+        Predict the highest quality (up to max_quality) whose encode stays
+        within bpp bits per pixel
+
+        observed, a (quality, bpp) pair from an encode of the same image,
+        rescales the model to match that image before predicting.
+
+        Returns None if no model has been fitted for the format yet.
+        """
+        if format not in self.coefficients:
+            return None
+        correction = 1.0
+        if observed is not None:
+            correction = observed[1] / self.predict_bpp(format, features, observed[0])
+        return _highest_quality(
+            lambda q: self.predict_bpp(format, features, q) * correction <= bpp, max_quality
+        )
+
+    def step_up_fits(self, format: str, features: list[float], quality: int,
+                     observed_bpp: float, bpp: float) -> Optional[bool]:
+        """
+        Predict whether one quality step above an encode measured at
+        observed_bpp would still stay within bpp
+
+        The model is rescaled to the measured encode, so only its slope
+        between the two qualities matters. Returns None without a fitted model.
+        """
+        at_quality = self.predict_bpp(format, features, quality)
+        if at_quality is None:
+            return None
+        step_up = self.predict_bpp(format, features, quality + 1)
+        return step_up * observed_bpp / at_quality <= bpp
@@ -0,0 +1,311 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Tuple, Optional
+
+from compressor._pil import convert_for, load_format_module, load_image_module
+from compressor.output import IN_PLACE, OutputPolicy
+from compressor.predict import QualityPredictor, image_features, interpolate_quality
+from compressor.writer import BatchWriter, open_input
+
+# Formats whose size responds to the quality setting
+LOSSY_FORMATS = {'JPEG', 'WEBP'}
+# Size-targeted encodes landing this fraction below max_size are accepted
+# (default for ImageProcessor's size_tolerance). The fitted predictor's
+# error puts most images inside a 25% band on their first encode; at 10%
+# most needed a second one.
+SIZE_TOLERANCE = 0.25
+
+class ImageProcessor:
+    def __init__(self, history_path: Optional[str] = None, size_tolerance: float = SIZE_TOLERANCE):
+        """
+        Args:
+            history_path: File encodes are recorded to and the quality
+                predictor is fitted from (optional)
+            size_tolerance: Fraction below max_size within which a
+                size-targeted encode is accepted without searching further
+        """
+        self.supported_formats = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+        self.writer = BatchWriter(self)
+        self.history = None
+        if history_path:
+            # Imported here so processors without history skip loading json
+            from compressor.history import History
+            self.history = History(history_path)
+        self.size_tolerance = size_tolerance
+        self.predictor = QualityPredictor()
+        # The predictor is fitted on the first size-targeted encode, so
+        # processors that never target a size don't read the history
+        self._fitted = False
+        self._fit_lock = threading.Lock()
+    
+    def is_supported_format(self, file_path: str) -> bool:
+        """Check if the file format is supported"""
+        ext = os.path.splitext(file_path.lower())[1]
+        return ext in self.supported_formats
+    
+    def get_image_info(self, image_path: str) -> Tuple[int, int, str, int]:
+        """Get image information (width, height, format, size)"""
+        try:
+            Image = load_image_module(image_path)
+            with Image.open(image_path) as img:
+                width, height = img.size
+                format = img.format
+                size = os.path.getsize(image_path)
+                return width, height, format, size
+        except Exception as e:
+            raise Exception(f"Error reading image: {str(e)}")
+    
+    def compress_image(self, 
+                      input_path: str, 
+                      output_path: str, 
+                      quality: int = 85,
+                      max_size: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Compress an image and save it to the output path
+        
+        Args:
+            input_path: Path to input image
+            output_path: Path to save compressed image
+            quality: Compression quality (1-100)
+            max_size: Maximum file size in bytes (optional)
+            
+        Returns:
+            Tuple of (original_size, compressed_size) in bytes
+        """
+        try:
+            return self.writer.compress(input_path, output_path, quality, max_size)
+        except Exception as e:
+            raise Exception(f"Error compressing image: {str(e)}")
+    
+    def encode_image(self,
+                     input_path: str,
+                     stream: BinaryIO,
+                     format: str,
+                     quality: int = 85,
+                     max_size: Optional[int] = None) -> int:
+        """
+        Compress an image into a writable binary stream
+        
+        Args:
+            input_path: Path to input image (memory-mapped while decoding)
+            stream: Seekable stream the encoded image is written to
+            format: Pillow format name to encode as (e.g. 'JPEG')
+            quality: Compression quality (1-100); the upper bound when
+                max_size is given
+            max_size: Maximum encoded size in bytes (optional)
+            
+        Returns:
+            Size of the original image in bytes
+        """
+        with self.open_image(input_path) as (img, original_size):
+            self.encode_loaded(img, stream, format, quality, max_size)
+        return original_size
+    
+    @contextmanager
+    def open_image(self, input_path: str):
+        """
+        Decode an image ready for encoding
+        
+        Yields a tuple of (image, original_size); the input stays
+        memory-mapped until the context exits.
+        """
+        Image = load_image_module(input_path)
+        with open_input(input_path) as (source, original_size):
+            with Image.open(source) as img:
+                # Convert to RGB if necessary (for PNG with transparency)
+                if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+                    background = Image.new('RGB', img.size, (255, 255, 255))
+                    background.paste(img, mask=img.split()[-1])
+                    img = background
+                yield img, original_size
+    
+    def save_image(self, img, stream: BinaryIO, format: str, quality: int):
+        """Encode a decoded image into stream"""
+        load_format_module(format)
+        img.save(stream,
+                format=format,
+                quality=quality, 
+                optimize=True)
+    
+    def encode_loaded(self,
+                      img,
+                      stream: BinaryIO,
+                      format: str,
+                      quality: int = 85,
+                      max_size: Optional[int] = None):
+        """
+        Encode a decoded image, aiming for max_size when it is given
+        
+        For lossy formats the starting quality is predicted from cheap image
+        features. A short search for the highest quality that fits only runs
+        when the prediction overshoots max_size, or lands more than
+        size_tolerance below it while the model (rescaled to the measured
+        size) expects the next quality step up to fit as well. The search
+        rescales the model by the first encode, then later probes interpolate
+        between earlier ones. Without a fitted predictor the search starts from
+        quality. Every lossy encode is recorded to the history (if
+        enabled) for fitting the predictor.
+        """
+        img = convert_for(img, format)
+        lossy = format in LOSSY_FORMATS
+        if not lossy or (max_size is None and self.history is None):
+            self.save_image(img, stream, format, quality)
+            return
+        
+        features = image_features(img, format)
+        pixels = img.size[0] * img.size[1]
+        
+        last = None
+        
+        def encode(q: int) -> int:
+            nonlocal last
+            last = q
+            stream.seek(0)
+            self.save_image(img, stream, format, q)
+            size = stream.tell()
+            if self.history is not None:
+                self.history.record(format, features, q, size * 8 / pixels)
+            return size
+        
+        if max_size is None:
+            encode(quality)
+            return
+        
+        if not self._fitted:
+            self.refit()
+        
+        # Aim for the middle of the accepted band rather than its edge
+        target_bpp = max_size * 8 / pixels
+        aim_bpp = target_bpp * (1 - self.size_tolerance / 2)
+        predicted = self.predictor.predict(format, features, aim_bpp, quality)
+        probe = predicted if predicted is not None else quality
+        
+        # Highest quality known to fit, lowest known not to, and every
+        # (quality, bpp) measured so far
+        best, over = None, quality + 1
+        measured = {}
+        while True:
+            size = encode(probe)
+            measured[probe] = size * 8 / pixels
+            if size <= max_size:
+                best = probe
+                # Accept anything in the band, or below it when the model
+                # says the next quality step up would already overshoot
+                if (probe == quality or size >= max_size * (1 - self.size_tolerance)
+                        or self.predictor.step_up_fits(format, features, probe,
+                                                       measured[probe], target_bpp) is False):
+                    return
+            else:
+                over = probe
+            
+            low, high = (best or 0) + 1, over - 1
+            if low > high:
+                break
+            
+            # Missed: the model error is mostly specific to this image, so
+            # rescale the model by the first encode, then interpolate between
+            # the probes bracketing the target (or the last two)
+            if len(measured) == 1 and predicted is not None:
+                guess = self.predictor.predict(format, features, aim_bpp, quality,
+                                               observed=(probe, measured[probe]))
+            elif len(measured) >= 2:
+                if best is not None and over in measured:
+                    a, b = best, over
+                else:
+                    a, b = list(measured)[-2:]
+                guess = interpolate_quality((a, measured[a]), (b, measured[b]), aim_bpp, quality)
+            else:
+                guess = None
+            if guess is None:
+                guess = (low + high) // 2
+            probe = min(high, max(low, guess))
+        
+        # Fall back to the lowest quality when max_size cannot be reached
+        best = best if best is not None else 1
+        if best != last:
+            encode(best)
+    
+    def refit(self):
+        """Refit the quality predictor from the recorded history"""
+        with self._fit_lock:
+            if self.history is not None:
+                self.predictor.fit(self.history.load())
+            self._fitted = True
+    
+    def batch_compress(self, 
+                      input_paths: list[str], 
+                      output_dir: Optional[str],
+                      quality: int = 85,
+                      workers: int = 1,
+                      policy: Optional[OutputPolicy] = None,
+                      max_size: Optional[int] = None) -> list[Tuple[str, int, int]]:
+        """
+        Compress multiple images
+        
+        Each worker thread reuses its own encode buffer across files. Results
+        are encoded in memory first, so files the policy decides to keep as
+        they are cost no disk writes. Inputs whose output would overwrite
+        another image (see OutputPolicy.plan) are skipped.
+        
+        Args:
+            input_paths: List of input image paths
+            output_dir: Directory to save compressed images (unused in place)
+            quality: Compression quality (1-100); the upper bound when
+                max_size is given
+            workers: Number of images to compress concurrently
+            policy: Output naming and keep-original rules; defaults to
+                writing compressed_{filename} into output_dir
+            max_size: Maximum file size in bytes per image (optional)
+            
+        Returns:
+            List of tuples containing (filename, original_size, compressed_size);
+            compressed_size equals original_size for originals that were kept
+        """
+        if policy is None:
+            policy = OutputPolicy()
+        input_paths = [p for p in input_paths if self.is_supported_format(p)]
+        
+        # Resolve every output up front so no file overwrites another image
+        output_paths, refused = policy.plan(input_paths, output_dir)
+        for input_path, reason in refused.items():
+            print(f"Skipping {os.path.basename(input_path)}: {reason}")
+        input_paths = list(output_paths)
+        
+        def compress_one(input_path: str) -> Optional[Tuple[str, int, int]]:
+            filename = os.path.basename(input_path)
+            
+            try:
+                output_path = output_paths[input_path]
+                orig_size, comp_size = self.writer.encode(
+                    input_path, output_path, quality, max_size
+                )
+                if not policy.should_write(orig_size, comp_size):
+                    return filename, orig_size, orig_size
+                
+                policy.prepare(output_path)
+                in_place = policy.mode == IN_PLACE
+                comp_size = self.writer.write(output_path, replace=in_place,
+                                               mode_from=input_path if in_place else None)
+                # On case-insensitive filesystems a.JPG -> a.jpg is the same
+                # file, which now holds the compressed image
+                if in_place and not os.path.samefile(output_path, input_path):
+                    os.remove(input_path)
+                return filename, orig_size, comp_size
+            except Exception as e:
+                print(f"Error processing {filename}: {str(e)}")
+                return None
+        
+        if workers > 1:
+            # Imported here: concurrent.futures pulls in logging at import time
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(compress_one, input_paths))
+        else:
+            outcomes = [compress_one(p) for p in input_paths]
+        
+        # Pick up what this batch recorded on the next size-targeted encode
+        if self.history is not None:
+            self.history.flush()
+            self._fitted = False
+        return [r for r in outcomes if r is not None] 
\ No newline at end of file
@@ -0,0 +1,146 @@
+import io
+import mmap
+import os
+import stat
+import threading
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+from compressor._pil import format_for
+
+
+@contextmanager
+def open_input(path: str):
+    """
+    Open an input image for decoding without copying it into Python memory
+
+    Yields a tuple of (stream, size). Non-empty files are memory-mapped so the
+    decoder reads straight from the page cache; empty files (which cannot be
+    mapped) are yielded as a plain file object.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            yield f, size
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped, size
+
+
+def _write_all(fd: int, data: memoryview) -> int:
+    written = 0
+    while written < len(data):
+        written += os.write(fd, data[written:])
+    return written
+
+
+def write_output(path: str, data: memoryview) -> int:
+    """Write data to path with a single unbuffered write, returning bytes written"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        return _write_all(fd, data)
+    finally:
+        os.close(fd)
+
+
+def replace_output(path: str, data: memoryview, mode_from: Optional[str] = None) -> int:
+    """
+    Atomically replace path with data, returning bytes written
+
+    The data goes to a uniquely named temporary file in the same directory,
+    which is renamed over path and removed if anything fails. It takes the
+    permission bits of mode_from, or of path if that already exists.
+    """
+    # Imported here: tempfile pulls in shutil and random at import time
+    import tempfile
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        try:
+            written = _write_all(fd, data)
+        finally:
+            os.close(fd)
+        source = mode_from or path
+        if os.path.exists(source):
+            os.chmod(temp_path, stat.S_IMODE(os.stat(source).st_mode))
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return written
+
+
+class BatchWriter:
+    """
+    Encodes images into reused per-thread buffers and writes each output with
+    one call, taking the compressed size from the bytes written instead of
+    stat-ing the files afterwards.
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+        self._local = threading.local()
+
+    def _buffer(self) -> io.BytesIO:
+        """Return this thread's encode buffer, rewound for reuse"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = io.BytesIO()
+        # Rewind rather than truncate so the allocation is kept between files;
+        # only the first tell() bytes are ever read back
+        buffer.seek(0)
+        return buffer
+
+    def encode(self,
+               input_path: str,
+               output_path: str,
+               quality: int = 85,
+               max_size: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Encode input_path in the format implied by output_path, keeping the
+        result in this thread's buffer until write() is called
+
+        With max_size, quality is the upper bound of a size-targeted encode.
+
+        Returns:
+            Tuple of (original_size, compressed_size) in bytes
+        """
+        buffer = self._buffer()
+        original_size = self.processor.encode_image(
+            input_path, buffer, format_for(output_path), quality, max_size
+        )
+        return original_size, buffer.tell()
+
+    def write(self, output_path: str, replace: bool = False, mode_from: Optional[str] = None) -> int:
+        """
+        Write this thread's most recently encoded image to output_path
+
+        With replace, the data is written to a temporary file next to
+        output_path and renamed over it, so an existing file is never left
+        half-written (see replace_output for mode_from).
+
+        Returns:
+            Number of bytes written
+        """
+        buffer = self._local.buffer
+        size = buffer.tell()
+        with buffer.getbuffer() as view, view[:size] as data:
+            if replace:
+                return replace_output(output_path, data, mode_from)
+            return write_output(output_path, data)
+
+    def compress(self,
+                 input_path: str,
+                 output_path: str,
+                 quality: int = 85,
+                 max_size: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Compress input_path into output_path
+
+        Returns:
+            Tuple of (original_size, compressed_size) in bytes
+        """
+        original_size, _ = self.encode(input_path, output_path, quality, max_size)
+        return original_size, self.write(output_path)
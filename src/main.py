@@ -9,7 +9,7 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt, QSize
 from PyQt6.QtGui import QPixmap, QImage, QClipboard, QPalette, QColor, QFont, QLinearGradient, QGradient, QIcon
-from image_processor import ImageProcessor
+from compressor import ImageProcessor
 from PyQt6.QtCore import pyqtSignal
 
 # Modern dark mode color scheme with purple accents
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from compressor import history
+from compressor.history import History
+
+
+def write_lines(path, lines):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(line + '\n' for line in lines)
+
+
+def record_line(i):
+    return json.dumps({'format': 'JPEG', 'features': [float(i)], 'quality': 50, 'bpp': 1.0})
+
+
+def test_records_are_buffered_until_flushed(tmp_path):
+    path = str(tmp_path / 'sub' / 'history.jsonl')
+    log = History(path)
+    log.record('JPEG', [1.0, 2.0], 80, 1.5)
+    assert not (tmp_path / 'sub').exists()
+    log.flush()
+    assert log.load() == [{'format': 'JPEG', 'features': [1.0, 2.0], 'quality': 80, 'bpp': 1.5}]
+    log.close()
+
+
+@pytest.mark.parametrize('read_block', [16, 64 * 1024])
+def test_load_returns_the_last_records(tmp_path, monkeypatch, read_block):
+    monkeypatch.setattr(history, 'READ_BLOCK', read_block)
+    path = str(tmp_path / 'history.jsonl')
+    write_lines(path, [record_line(i) for i in range(50)])
+    records = History(path).load(limit=7)
+    assert [r['features'][0] for r in records] == [float(i) for i in range(43, 50)]
+
+
+def test_load_skips_malformed_lines(tmp_path):
+    path = str(tmp_path / 'history.jsonl')
+    write_lines(path, [record_line(0), '{"format": "JPEG"', 'not json',
+                       json.dumps({'format': 'JPEG', 'features': 'x', 'quality': 1, 'bpp': 1}),
+                       record_line(1)])
+    records = History(path).load()
+    assert [r['features'][0] for r in records] == [0.0, 1.0]
+
+
+def test_load_without_a_log(tmp_path):
+    assert History(str(tmp_path / 'missing.jsonl')).load() == []
+
+
+def test_compaction_keeps_the_most_recent_records(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, 'MAX_BYTES', 1000)
+    monkeypatch.setattr(history, 'KEEP_RECORDS', 5)
+    monkeypatch.setattr(history, 'FLUSH_EVERY', 4)
+    path = tmp_path / 'history.jsonl'
+    log = History(str(path))
+    for i in range(40):
+        log.record('JPEG', [float(i)], 50, 1.0)
+    log.close()
+    assert path.stat().st_size <= 1000
+    records = log.load(limit=100)
+    assert records[-1]['features'] == [39.0]
+    assert [r['features'][0] for r in records] == sorted({r['features'][0] for r in records})
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['history.jsonl', 'history.jsonl.lock']
+
+
+def test_appends_after_another_handle_compacts_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, 'MAX_BYTES', 1000)
+    monkeypatch.setattr(history, 'KEEP_RECORDS', 5)
+    path = str(tmp_path / 'history.jsonl')
+    first, second = History(path), History(path)
+    first.record('JPEG', [-1.0], 50, 1.0)
+    first.flush()
+    for i in range(40):
+        second.record('JPEG', [float(i)], 50, 1.0)
+    second.flush()
+    first.record('JPEG', [100.0], 50, 1.0)
+    first.close()
+    second.close()
+    assert History(path).load()[-1]['features'] == [100.0]
@@ -0,0 +1,110 @@
+import os
+
+import pytest
+
+from compressor.output import OutputPolicy
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x')
+    return path
+
+
+def test_plan_duplicate_inputs_are_planned_once(tmp_path):
+    a = touch(str(tmp_path / 'in' / 'a.jpg'))
+    outputs, refused = OutputPolicy().plan([a, a, os.path.join(str(tmp_path), 'in', '.', 'a.jpg')],
+                                           str(tmp_path / 'out'))
+    assert list(outputs) == [a]
+    assert outputs[a] == os.path.join(str(tmp_path / 'out'), 'compressed_a.jpg')
+    assert refused == {}
+
+
+def test_plan_refuses_colliding_outputs(tmp_path):
+    a = touch(str(tmp_path / 'a.png'))
+    b = touch(str(tmp_path / 'A.jpg'))
+    c = touch(str(tmp_path / 'c.png'))
+    policy = OutputPolicy(template='{stem}{ext}', extension='.webp')
+    outputs, refused = policy.plan([a, b, c], str(tmp_path / 'out'))
+    assert list(outputs) == [c]
+    assert set(refused) == {a, b}
+    assert 'also the output of' in refused[a]
+
+
+def test_plan_refuses_output_that_is_another_input(tmp_path):
+    a = touch(str(tmp_path / 'a.jpg'))
+    b = touch(str(tmp_path / 'compressed_a.jpg'))
+    outputs, refused = OutputPolicy().plan([a, b], str(tmp_path))
+    assert a in refused and 'another input' in refused[a]
+    assert b in outputs
+
+
+def test_plan_refuses_existing_in_place_target(tmp_path):
+    a = touch(str(tmp_path / 'a.png'))
+    touch(str(tmp_path / 'a.webp'))
+    b = touch(str(tmp_path / 'b.png'))
+    outputs, refused = OutputPolicy('in_place', extension='.webp').plan([a, b])
+    assert outputs == {b: str(tmp_path / 'b.webp')}
+    assert 'already exists' in refused[a]
+
+
+def test_plan_in_place_may_replace_the_input(tmp_path):
+    a = touch(str(tmp_path / 'a.jpg'))
+    outputs, refused = OutputPolicy('in_place').plan([a])
+    assert outputs == {a: a}
+    assert refused == {}
+
+
+@pytest.mark.parametrize('mode', ['flat', 'mirror'])
+def test_plan_refuses_output_that_is_the_input_outside_in_place(tmp_path, mode):
+    a = touch(str(tmp_path / 'a.jpg'))
+    policy = OutputPolicy(mode, template='{name}', source_root=str(tmp_path))
+    outputs, refused = policy.plan([a], str(tmp_path))
+    assert outputs == {}
+    assert 'in_place' in refused[a]
+
+
+def test_plan_refuses_inputs_outside_mirror_root(tmp_path):
+    a = touch(str(tmp_path / 'src' / 'a.jpg'))
+    b = touch(str(tmp_path / 'elsewhere' / 'b.jpg'))
+    policy = OutputPolicy('mirror', source_root=str(tmp_path / 'src'))
+    outputs, refused = policy.plan([a, b], str(tmp_path / 'out'))
+    assert outputs == {a: os.path.join(str(tmp_path / 'out'), 'a.jpg')}
+    assert 'outside' in refused[b]
+
+
+@pytest.mark.parametrize('template', ['{size}', '{name', '{0}', '../{name}', 'sub/{name}', '..', ''])
+def test_bad_templates_are_rejected_up_front(template):
+    if template == '':
+        # An empty template falls back to the mode's default
+        OutputPolicy(template=template)
+        return
+    with pytest.raises(ValueError):
+        OutputPolicy(template=template)
+
+
+def test_extension_rewrite_and_validation():
+    assert OutputPolicy(template='{stem}{ext}', extension='webp').output_name('dir/a.PNG') == 'a.webp'
+    with pytest.raises(ValueError):
+        OutputPolicy(extension='.gif')
+
+
+@pytest.mark.parametrize('min_savings, original, compressed, expected', [
+    (None, 100, 150, True),
+    (0, 100, 99, True),
+    (0, 100, 100, False),
+    (10, 100, 90, True),
+    (10, 100, 91, False),
+    (10, 0, 0, False),
+])
+def test_should_write_thresholds(min_savings, original, compressed, expected):
+    policy = OutputPolicy('flat', min_savings=min_savings)
+    assert policy.should_write(original, compressed) is expected
+
+
+def test_in_place_defaults_to_only_writing_smaller_results():
+    policy = OutputPolicy('in_place')
+    assert policy.min_savings == 0
+    assert not policy.should_write(100, 100)
+    assert OutputPolicy('flat').min_savings is None
@@ -0,0 +1,59 @@
+import math
+import random
+
+from compressor.predict import FEATURE_COUNT, MIN_SAMPLES, QualityPredictor, interpolate_quality, _quantizer_scale
+
+
+def true_bpp(features, quality):
+    return math.exp(0.5 + 0.4 * features[0] - 0.3 * features[3]
+                    - (0.9 + 0.1 * features[0]) * _quantizer_scale(quality))
+
+
+def records(count, seed=0):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(count):
+        features = [rng.uniform(0, 8)] + [rng.uniform(0, 1) for _ in range(FEATURE_COUNT - 1)]
+        quality = rng.randint(20, 95)
+        out.append({'format': 'JPEG', 'features': features, 'quality': quality,
+                    'bpp': true_bpp(features, quality)})
+    return out
+
+
+def test_predict_inverts_the_fitted_model():
+    predictor = QualityPredictor()
+    predictor.fit(records(300))
+    for record in records(20, seed=1):
+        features = record['features']
+        target = true_bpp(features, 70)
+        quality = predictor.predict('JPEG', features, target)
+        assert 65 <= quality <= 72
+        assert abs(predictor.predict_bpp('JPEG', features, 70) / target - 1) < 0.05
+
+
+def test_no_model_without_enough_samples():
+    predictor = QualityPredictor()
+    predictor.fit(records(MIN_SAMPLES - 1))
+    assert predictor.predict('JPEG', records(1)[0]['features'], 1.0) is None
+    single_quality = [dict(r, quality=80) for r in records(100)]
+    predictor.fit(single_quality)
+    assert predictor.predict('JPEG', records(1)[0]['features'], 1.0) is None
+
+
+def test_observed_encode_rescales_the_prediction():
+    predictor = QualityPredictor()
+    predictor.fit(records(300))
+    features = records(1, seed=2)[0]['features']
+    target = predictor.predict_bpp('JPEG', features, 60)
+    assert predictor.predict('JPEG', features, target, observed=(80, predictor.predict_bpp('JPEG', features, 80))) == 60
+    # An image twice as large as the model expects needs a lower quality
+    doubled = (80, 2 * predictor.predict_bpp('JPEG', features, 80))
+    assert predictor.predict('JPEG', features, target, observed=doubled) < 60
+
+
+def test_interpolate_quality():
+    features = records(1)[0]['features']
+    a, b = (50, true_bpp(features, 50)), (90, true_bpp(features, 90))
+    assert interpolate_quality(a, b, true_bpp(features, 70)) in (69, 70)
+    assert interpolate_quality(a, (50, 2.0), 1.0) is None
+    assert interpolate_quality((50, 2.0), (90, 1.0), 1.5) is None
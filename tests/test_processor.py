@@ -0,0 +1,68 @@
+import os
+import random
+
+import pytest
+from PIL import Image
+
+from compressor import ImageProcessor, OutputPolicy
+
+
+def make_jpeg(path, size=(96, 64), seed=0, quality=95):
+    rng = random.Random(seed)
+    img = Image.new('RGB', size)
+    img.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256))
+                 for _ in range(size[0] * size[1])])
+    img.save(path, 'JPEG', quality=quality)
+    return path
+
+
+def test_duplicate_inputs_are_compressed_once(tmp_path):
+    a = make_jpeg(str(tmp_path / 'a.jpg'))
+    results = ImageProcessor().batch_compress([a, a], str(tmp_path / 'out'), quality=50)
+    assert [r[0] for r in results] == ['a.jpg']
+    assert os.listdir(str(tmp_path / 'out')) == ['compressed_a.jpg']
+
+
+def test_refused_inputs_are_skipped(tmp_path, capsys):
+    a = make_jpeg(str(tmp_path / 'a.jpg'))
+    with open(a, 'rb') as f:
+        original = f.read()
+    policy = OutputPolicy(template='{name}')
+    assert ImageProcessor().batch_compress([a], str(tmp_path), quality=50, policy=policy) == []
+    assert 'Skipping a.jpg' in capsys.readouterr().out
+    with open(a, 'rb') as f:
+        assert f.read() == original
+
+
+def test_in_place_keeps_originals_that_do_not_shrink(tmp_path):
+    small = make_jpeg(str(tmp_path / 'small.jpg'), size=(256, 256), seed=1, quality=5)
+    large = make_jpeg(str(tmp_path / 'large.jpg'), seed=2, quality=100)
+    small_size, large_size = os.path.getsize(small), os.path.getsize(large)
+    results = ImageProcessor().batch_compress([small, large], None, quality=90,
+                                              policy=OutputPolicy('in_place'))
+    sizes = {name: (orig, comp) for name, orig, comp in results}
+    assert sizes['small.jpg'] == (small_size, small_size)
+    assert os.path.getsize(small) == small_size
+    assert sizes['large.jpg'][1] < large_size == sizes['large.jpg'][0]
+    assert os.path.getsize(large) == sizes['large.jpg'][1]
+    assert sorted(os.listdir(str(tmp_path))) == ['large.jpg', 'small.jpg']
+
+
+def test_in_place_extension_rewrite_removes_the_original(tmp_path):
+    a = make_jpeg(str(tmp_path / 'a.jpg'))
+    policy = OutputPolicy('in_place', extension='.webp', min_savings=None)
+    ImageProcessor().batch_compress([a], None, quality=50, policy=policy)
+    assert os.listdir(str(tmp_path)) == ['a.webp']
+    with Image.open(str(tmp_path / 'a.webp')) as img:
+        assert img.format == 'WEBP'
+
+
+@pytest.mark.parametrize('ext', ['.jpg', '.webp'])
+def test_max_size_is_respected(tmp_path, ext):
+    inputs = [make_jpeg(str(tmp_path / f'{i}.jpg'), size=(160, 120), seed=i) for i in range(3)]
+    policy = OutputPolicy(extension=ext)
+    processor = ImageProcessor(history_path=str(tmp_path / 'history.jsonl'))
+    results = processor.batch_compress(inputs, str(tmp_path / 'out'), quality=95,
+                                       policy=policy, max_size=12000)
+    assert len(results) == 3
+    assert all(comp <= 12000 for _, _, comp in results)
@@ -0,0 +1,45 @@
+import os
+import stat
+
+import pytest
+
+from compressor import writer
+from compressor.writer import replace_output
+
+
+def test_replace_output_replaces_atomically_and_keeps_mode(tmp_path):
+    path = str(tmp_path / 'a.jpg')
+    with open(path, 'wb') as f:
+        f.write(b'original')
+    os.chmod(path, 0o640)
+    assert replace_output(path, memoryview(b'new')) == 3
+    with open(path, 'rb') as f:
+        assert f.read() == b'new'
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert os.listdir(str(tmp_path)) == ['a.jpg']
+
+
+def test_replace_output_takes_mode_from_source(tmp_path):
+    source = str(tmp_path / 'a.png')
+    with open(source, 'wb') as f:
+        f.write(b'original')
+    os.chmod(source, 0o600)
+    path = str(tmp_path / 'a.webp')
+    replace_output(path, memoryview(b'new'), mode_from=source)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_replace_output_removes_temporary_file_on_failure(tmp_path, monkeypatch):
+    path = str(tmp_path / 'a.jpg')
+    with open(path, 'wb') as f:
+        f.write(b'original')
+
+    def fail(fd, data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(writer, '_write_all', fail)
+    with pytest.raises(OSError):
+        replace_output(path, memoryview(b'new'))
+    assert os.listdir(str(tmp_path)) == ['a.jpg']
+    with open(path, 'rb') as f:
+        assert f.read() == b'original'